@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+import requests
+from helpers import ThreadSessions
+
+CONTENT_TYPE_EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png",
+                           "image/gif": ".gif", "image/webp": ".webp"}
+INDEX_SAVE_INTERVAL = 50
+
+
+class AssetCache:
+    """
+    Content-addressed local cache for the images used by the generated website.
+    Files are named after the SHA-256 of their content, and an index maps every
+    downloaded URL to its file so it is not fetched again on the next build.
+    """
+
+    def __init__(self, cache_dir, max_workers=8):
+        """
+        Initialize the AssetCache instance.
+        Args:
+        cache_dir (str): The directory the images are stored in.
+        max_workers (int): Number of downloads that may run at once.
+        """
+        self.cache_dir = cache_dir
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._max_workers = max_workers
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            with open(self._index_path, "r") as handle:
+                self._index = json.load(handle)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._index = {}
+        if not isinstance(self._index, dict):
+            self._index = {}
+
+    def _is_cached(self, url):
+        """
+        Checks whether a URL was already downloaded and its file is still present.
+        Args:
+        url (str): The remote URL.
+        Returns:
+        bool: True if the cached file can be used.
+        """
+        file_name = self._index.get(url)
+        return file_name is not None and os.path.exists(os.path.join(self.cache_dir, file_name))
+
+    def _save_index(self):
+        """
+        Writes the URL index through a temporary file, so an interrupted
+        write never leaves a truncated index behind.
+        """
+        temp_file_path = self._index_path + ".tmp"
+        with open(temp_file_path, "w") as handle:
+            json.dump(self._index, handle, indent=4)
+        os.replace(temp_file_path, self._index_path)
+
+    def _download(self, url, sessions):
+        """
+        Downloads a URL and stores it under the hash of its content.
+        Args:
+        url (str): The remote URL.
+        sessions (ThreadSessions): The sessions of the current fetch run.
+        Returns:
+        str: The cached file name, or None if the download failed.
+        """
+        try:
+            response = sessions.get().get(url, timeout=10)
+        except requests.RequestException:
+            return None
+        if response.status_code != 200:
+            return None
+        extension = os.path.splitext(urlparse(url).path)[1].lower()
+        if not extension:
+            content_type = response.headers.get("Content-Type", "").split(";")[0]
+            extension = CONTENT_TYPE_EXTENSIONS.get(content_type, "")
+        file_name = hashlib.sha256(response.content).hexdigest() + extension
+        file_path = os.path.join(self.cache_dir, file_name)
+        if not os.path.exists(file_path):
+            temp_file_path = f"{file_path}.{threading.get_ident()}.tmp"
+            with open(temp_file_path, "wb") as handle:
+                handle.write(response.content)
+            os.replace(temp_file_path, file_path)
+        return file_name
+
+    def fetch_all(self, urls):
+        """
+        Downloads all URLs that are not cached yet, concurrently.
+        Args:
+        urls (iterable): The remote URLs, anything that is not http(s) is ignored.
+        Returns:
+        dict: Every cached URL mapped to its path relative to the cache directory's parent.
+        """
+        wanted = {url for url in urls if url and url.startswith(("http://", "https://"))}
+        missing = [url for url in wanted if not self._is_cached(url)]
+        if missing:
+            with ThreadSessions() as sessions, \
+                    ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                futures = {executor.submit(self._download, url, sessions): url for url in missing}
+                try:
+                    for completed, future in enumerate(as_completed(futures), start=1):
+                        file_name = future.result()
+                        if file_name is not None:
+                            self._index[futures[future]] = file_name
+                        if completed % INDEX_SAVE_INTERVAL == 0:
+                            self._save_index()
+                finally:
+                    self._save_index()
+        cache_name = os.path.basename(os.path.normpath(self.cache_dir))
+        return {url: f"{cache_name}/{self._index[url]}"
+                for url in wanted if url in self._index}
@@ -1,3 +1,6 @@
+import threading
+import requests
+
 YELLOW = "\033[33m"
 RED = "\033[31m"
 MAGENTA = "\033[35m"
@@ -42,4 +45,40 @@ def return_to_menu():
     """
     Displays a message and waits for user input before returning to the main menu.
     """
-    input(input_color("Press enter to continue"))
\ No newline at end of file
+    input(input_color("Press enter to continue"))
+
+class ThreadSessions:
+    """
+    Hands every worker thread of a run its own requests session, so connections
+    are reused between calls, and closes all of them when the run ends.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Returns the requests session of the current thread, creating it on first use.
+        """
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+            with self._lock:
+                self._sessions.append(self._local.session)
+        return self._local.session
+
+    def close(self):
+        """
+        Closes every session handed out by this instance.
+        """
+        with self._lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -33,3 +33,10 @@ class IStorage(ABC):
         Abstract method to update a movie.
         """
         pass
+
+    @abstractmethod
+    def update_movies(self, changes):
+        """
+        Abstract method to apply changed fields to several movies in one write.
+        """
+        pass
@@ -1,9 +1,16 @@
 from statistics import median
+import glob
+import os
 import random
 from fuzzywuzzy import fuzz
 import matplotlib.pyplot as plt
+from asset_cache import AssetCache
+from rating_refresher import RatingRefresher
 from helpers import input_color, user_choice_color, error_color, return_to_menu, YELLOW, RESET_COLOR
 
+PAGE_SIZE = 48
+NAVIGATION_WINDOW = 2
+
 
 class MovieApp:
     """
@@ -52,6 +59,21 @@ class MovieApp:
         self._storage.update_movie()
         self.movies = self._storage.list_movies()
 
+    def _command_refresh_ratings(self):
+        """
+        Re-queries OMDb for stale movies (or all of them) and stores the updated ratings.
+        """
+        refresh_all = input(input_color("Refresh all movies, not only stale ones? (y/n): "))
+        changes, failed = RatingRefresher(self._storage).refresh(refresh_all.lower() == "y")
+        self.movies = self._storage.list_movies()
+        updated = [title for title, fields in changes.items() if len(fields) > 1]
+        print(f"{len(changes)} movies refreshed, {len(updated)} with new data")
+        for title in updated:
+            print(f"{title}: {self.movies[title]['rating']}")
+        if failed:
+            print(error_color(f"{len(failed)} movies could not be refreshed: {', '.join(failed)}"))
+        return_to_menu()
+
     def _average(self):
         """
         Calculates the average rating of all movies.
@@ -152,58 +174,108 @@ class MovieApp:
             print(f"{key}: {val['rating']}")
         return_to_menu()
 
-    def get_movie_data(self):
+    def get_movie_data(self, titles, flags, local_assets):
         """
-        Retrieves movie data and generates an HTML representation.
+        Generates the HTML representation of one page of movies.
+        Parameters:
+        - titles (list): The titles of the movies on the page.
+        - flags (dict): Movie titles mapped to the remote URL of their country flag.
+        - local_assets (dict): Remote image URLs mapped to their locally cached paths.
         Returns:
         str: A string containing HTML representation of movie data.
         """
         url_imdb = "https://www.imdb.com/title/"
-        url_country_flag = "https://flagcdn.com/60x45/"
         movie_data_str = ""
-        for key, val in self.movies.items():
-            if isinstance(val, dict) and 'comment' in val:
-                movie_data_str += f"""
+        for key in titles:
+            val = self.movies[key]
+            poster = local_assets.get(val['poster'], val['poster'])
+            flag = ""
+            if flags.get(key):
+                flag = f"""<img class= "movie-flag" src="{local_assets.get(flags[key], flags[key])}" alt="{key}" loading="lazy">"""
+            movie_data_str += f"""
             <li>
                 <div class="movie">
                   <a href="{url_imdb}{val['id']}/">
                     <img class="movie-poster"
-                        src="{val['poster']}"
-                        title="{val['comment']}"/>
+                        src="{poster}"
+                        title="{val.get('comment') or ''}"
+                        loading="lazy"/>
                   </a>
-                    <div class="movie-title">{key}<img class= "movie-flag" src="{url_country_flag + self._storage.get_country_id_flag(key) + '.png'}" alt="{key}"></div>
-                    <div class="movie-year">{val['year']}</div>
-                    <div class="movie-title">{val['rating']}</div>
-                </div>
-            </li>"""
-            else:
-                movie_data_str += f"""
-            <li>
-                <div class="movie">
-                  <a href="{url_imdb}{val['id']}/">
-                    <img class="movie-poster"
-                        src="{val['poster']}""
-                        title=""/>
-                  </a>
-                    <div class="movie-title">{key}<img class= "movie-flag" src="{url_country_flag + self._storage.get_country_id_flag(key) + '.png'}" alt="{key}"></div>
+                    <div class="movie-title">{key}{flag}</div>
                     <div class="movie-year">{val['year']}</div>
                     <div class="movie-title">{val['rating']}</div>
                 </div>
             </li>"""
         return movie_data_str
 
-    def _generate_website(self, movies_data):
+    @staticmethod
+    def _page_file_name(page_number):
         """
-        Generates an HTML website with the given movie data.
+        Returns the file name of a website page, the first page being index.html.
         Parameters:
-        - movies_data (str): The movie data in HTML format.
+        - page_number (int): The 1-based page number.
+        Returns:
+        str: The page file name.
         """
+        return "index.html" if page_number == 1 else f"page-{page_number}.html"
+
+    def _page_navigation(self, page_number, total_pages):
+        """
+        Generates the links to the first, previous, neighbouring, next and last pages,
+        so the navigation stays the same size however many pages there are.
+        Parameters:
+        - page_number (int): The 1-based number of the current page.
+        - total_pages (int): The number of pages.
+        Returns:
+        str: A string containing HTML representation of the page navigation.
+        """
+        if total_pages == 1:
+            return ""
+        links = ""
+        if page_number > 1:
+            links += f"""<a href="{self._page_file_name(1)}">&laquo; First</a>"""
+            links += f"""<a href="{self._page_file_name(page_number - 1)}">&lsaquo; Prev</a>"""
+        first_neighbour = max(1, page_number - NAVIGATION_WINDOW)
+        last_neighbour = min(total_pages, page_number + NAVIGATION_WINDOW)
+        for number in range(first_neighbour, last_neighbour + 1):
+            if number == page_number:
+                links += f"""<span class="current-page">{number}</span>"""
+            else:
+                links += f"""<a href="{self._page_file_name(number)}">{number}</a>"""
+        if page_number < total_pages:
+            links += f"""<a href="{self._page_file_name(page_number + 1)}">Next &rsaquo;</a>"""
+            links += f"""<a href="{self._page_file_name(total_pages)}">Last &raquo;</a>"""
+        return f"""<div class="page-navigation">{links}</div>"""
+
+    def _generate_website(self):
+        """
+        Generates the HTML website, split into pages of PAGE_SIZE movies.
+        Posters and flags are downloaded concurrently into a local cache
+        and the pages reference the cached copies.
+        """
+        url_country_flag = "https://flagcdn.com/60x45/"
+        flags = {key: url_country_flag + country_id + ".png"
+                 for key, country_id in self._storage.get_country_id_flags(self.movies).items()}
+        posters = [val['poster'] for val in self.movies.values()]
+        local_assets = AssetCache("_static/cache").fetch_all(posters + list(flags.values()))
+
         with open("_static/index_template.html", "r") as html_file:
             data = html_file.read()
+        titles = list(self.movies)
+        pages = [titles[i:i + PAGE_SIZE] for i in range(0, len(titles), PAGE_SIZE)] or [[]]
+        for page_number, page_titles in enumerate(pages, start=1):
+            movies_data = self.get_movie_data(page_titles, flags, local_assets)
             new_data = data.replace("__TEMPLATE_MOVIE_GRID__", movies_data)
-        with open("_static/index.html", "w") as updated_html_file:
-            updated_html_file.write(new_data)
-        print("Website was generated successfully.")
+            new_data = new_data.replace("__TEMPLATE_PAGE_NAVIGATION__",
+                                        self._page_navigation(page_number, len(pages)))
+            with open(os.path.join("_static", self._page_file_name(page_number)), "w") as updated_html_file:
+                updated_html_file.write(new_data)
+
+        for stale_page in glob.glob("_static/page-*.html"):
+            page_number = os.path.basename(stale_page)[len("page-"):-len(".html")]
+            if page_number.isdigit() and int(page_number) > len(pages):
+                os.remove(stale_page)
+        print(f"Website was generated successfully ({len(pages)} pages).")
         return_to_menu()
 
     def _command_ratings_histogram(self):
@@ -240,10 +312,11 @@ class MovieApp:
       8. Movies sorted by rating
       9. Generate website
       10. Create a Histogram of Rates
+      11. Refresh ratings
       """ + RESET_COLOR)
 
-            choice_menu = input(input_color("Enter choice (0-10): "))
-            if int(choice_menu) < 0 or int(choice_menu) > 10:
+            choice_menu = input(input_color("Enter choice (0-11): "))
+            if int(choice_menu) < 0 or int(choice_menu) > 11:
                 print(error_color("Invalid Choice"))
             elif choice_menu == "1":
                 print(self._command_list_movies())
@@ -264,10 +337,11 @@ class MovieApp:
             elif choice_menu == "8":
                 self._command_sorted_movies()
             elif choice_menu == "9":
-                movie_info = self.get_movie_data()
-                self._generate_website(movie_info)
+                self._generate_website()
             elif choice_menu == "10":
                 self._command_ratings_histogram()
+            elif choice_menu == "11":
+                self._command_refresh_ratings()
             elif choice_menu == "0":
                 print("Bye!")
                 break
@@ -0,0 +1,171 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+import requests
+from helpers import ThreadSessions
+
+OMDB_URL = "http://www.omdbapi.com/"
+API_KEY = "eaf9a303"
+STALE_AFTER = 7 * 24 * 60 * 60
+
+
+class RateLimiter:
+    """
+    Spaces out calls so that no more than a fixed number start per second,
+    shared between all worker threads.
+    """
+
+    def __init__(self, calls_per_second):
+        """
+        Initialize the RateLimiter instance.
+        Args:
+        calls_per_second (float): Maximum number of calls started per second,
+        0 or None disables the limit.
+        """
+        self._interval = 1 / calls_per_second if calls_per_second else 0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """
+        Blocks until the caller is allowed to start its next call.
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class RatingRefresher:
+    """
+    Re-queries OMDb by IMDb id for the stored movies and writes the changed
+    fields back to the storage in a single batched update.
+    """
+
+    def __init__(self, storage, base_url=OMDB_URL, api_key=API_KEY, max_workers=8,
+                 calls_per_second=10, retries=3, backoff=0.5, stale_after=STALE_AFTER):
+        """
+        Initialize the RatingRefresher instance.
+        Args:
+        storage (IStorage): The storage holding the movies to refresh.
+        base_url (str): The OMDb endpoint, overridable to point at a local stub server.
+        api_key (str): The OMDb API key.
+        max_workers (int): Number of requests that may be in flight at once.
+        calls_per_second (float): Maximum request rate against the API, 0 or None for no limit.
+        retries (int): How many times a failed request is retried.
+        backoff (float): Base delay in seconds, doubled after every retry.
+        stale_after (float): Age in seconds after which a movie is refreshed again.
+        """
+        self._storage = storage
+        self._base_url = base_url
+        self._api_key = api_key
+        self._max_workers = max_workers
+        self._limiter = RateLimiter(calls_per_second)
+        self._retries = retries
+        self._backoff = backoff
+        self._stale_after = stale_after
+
+    def stale_movies(self, movies, refresh_all=False, now=None):
+        """
+        Selects the movies that need to be refreshed.
+        Args:
+        movies (dict): The movies as returned by list_movies.
+        refresh_all (bool): Refresh every movie regardless of its timestamp.
+        now (float): The current time, defaults to time.time().
+        Returns:
+        dict: The movie titles mapped to their IMDb ids.
+        """
+        now = time.time() if now is None else now
+        stale = {}
+        for title, val in movies.items():
+            if not val.get('id'):
+                continue
+            last_refreshed = float(val.get('last_refreshed') or 0)
+            if refresh_all or now - last_refreshed >= self._stale_after:
+                stale[title] = val['id']
+        return stale
+
+    def _fetch(self, imdb_id, sessions):
+        """
+        Fetches the OMDb record of a movie, retrying with exponential backoff
+        on connection errors, rate limiting and server errors.
+        Args:
+        imdb_id (str): The IMDb id of the movie.
+        sessions (ThreadSessions): The sessions of the current refresh run.
+        Returns:
+        dict: The OMDb record, or None if it could not be retrieved.
+        """
+        params = {"apikey": self._api_key, "i": imdb_id}
+        for attempt in range(self._retries + 1):
+            self._limiter.wait()
+            try:
+                response = sessions.get().get(self._base_url, params=params, timeout=10)
+            except requests.RequestException:
+                response = None
+            if response is not None and response.status_code == 200:
+                try:
+                    movie_info = response.json()
+                except ValueError:
+                    return None
+                if not isinstance(movie_info, dict) or movie_info.get('Response') == 'False':
+                    return None
+                return movie_info
+            if response is not None and response.status_code != 429 \
+                    and response.status_code < 500:
+                return None
+            if attempt < self._retries:
+                time.sleep(self._backoff * 2 ** attempt)
+        return None
+
+    def _changed_fields(self, movie, movie_info, now):
+        """
+        Compares a stored movie with its OMDb record.
+        Args:
+        movie (dict): The stored movie.
+        movie_info (dict): The OMDb record.
+        now (float): The refresh timestamp.
+        Returns:
+        dict: The fields to write back, always including the new timestamp.
+        """
+        changes = {"last_refreshed": now}
+        try:
+            rating = float(movie_info.get('imdbRating'))
+        except (TypeError, ValueError):
+            rating = None
+        if rating is not None and rating != float(movie['rating']):
+            changes['rating'] = rating
+        poster = movie_info.get('Poster')
+        if poster and poster != "N/A" and poster != movie.get('poster'):
+            changes['poster'] = poster
+        return changes
+
+    def refresh(self, refresh_all=False):
+        """
+        Refreshes all stale movies (or every movie) and stores the result.
+        Args:
+        refresh_all (bool): Refresh every movie regardless of its timestamp.
+        Returns:
+        tuple: The refreshed movie titles mapped to their changed fields,
+        and the list of stale titles that could not be refreshed.
+        """
+        movies = self._storage.list_movies()
+        stale = self.stale_movies(movies, refresh_all)
+        if not stale:
+            return {}, []
+        with ThreadSessions() as sessions, \
+                ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            results = dict(zip(stale, executor.map(self._fetch, stale.values(), repeat(sessions))))
+        now = int(time.time())
+        changes = {}
+        failed = []
+        for title, movie_info in results.items():
+            if movie_info is None:
+                failed.append(title)
+            else:
+                changes[title] = self._changed_fields(movies[title], movie_info, now)
+        if changes:
+            self._storage.update_movies(changes)
+        return changes, failed
@@ -1,6 +1,7 @@
 import csv
 import json
 import os
+import time
 import requests
 from helpers import input_color, user_choice_color, error_color, return_to_menu
 from istorage import IStorage
@@ -10,6 +11,8 @@ class StorageCsv(IStorage):
     """
     CSV storage implementation for storing movie data.
     """
+    fieldnames = ["title", "rating", "year", "id", "country", "comment", "poster",
+                  "last_refreshed"]
 
     def __init__(self, file_path):
         """
@@ -24,7 +27,25 @@ class StorageCsv(IStorage):
         except FileNotFoundError:
             with open(self.file_path, "w") as handle:
                 writer = csv.writer(handle)
-                writer.writerow(["title", "rating", "year", "id", "country", "comment", "poster"])
+                writer.writerow(self.fieldnames)
+        self._migrate_header()
+
+    def _migrate_header(self):
+        """
+        Upgrade a CSV file written before the current columns were added
+        by replacing its header, the existing rows are kept as they are.
+        """
+        with open(self.file_path, "r", newline='') as handle:
+            rows = list(csv.reader(handle))
+        header = rows[0] if rows else []
+        if header == self.fieldnames or header != self.fieldnames[:len(header)]:
+            return
+        temp_file_path = self.file_path + ".tmp"
+        with open(temp_file_path, "w", newline='') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(self.fieldnames)
+            writer.writerows(rows[1:])
+        os.replace(temp_file_path, self.file_path)
 
     def list_movies(self):
         """
@@ -75,7 +96,8 @@ class StorageCsv(IStorage):
                             return return_to_menu()
                 with open(self.file_path, "a", newline='') as handle:
                     writer = csv.writer(handle)
-                    writer.writerow([title, rating, year, imdb_id, modified_country, "", poster])
+                    writer.writerow([title, rating, year, imdb_id, modified_country, "", poster,
+                                     int(time.time())])
 
                 print(f"Movie {user_choice_color(new_movie)} successfully added")
                 return_to_menu()
@@ -91,11 +113,11 @@ class StorageCsv(IStorage):
             input_color("Enter the name of the movie you want to delete: "))
 
         temp_file_path = self.file_path + ".tmp"
-        fieldnames = ['title', 'rating', 'year', 'id', 'country', 'comment', 'poster']
 
         with open(self.file_path, "r") as handle, open(temp_file_path, "w", newline="") as temp_handle:
             reader = csv.DictReader(handle)
-            writer = csv.DictWriter(temp_handle, fieldnames=fieldnames)
+            writer = csv.DictWriter(temp_handle, fieldnames=self.fieldnames,
+                                    extrasaction="ignore", restval="")
 
             writer.writeheader()
             for row in reader:
@@ -131,8 +153,8 @@ class StorageCsv(IStorage):
 
         if updated:
             with open(self.file_path, "w", newline='') as handle:
-                fieldnames = ['title', 'rating', 'year', 'id', 'country', 'comment', 'poster']
-                writer = csv.DictWriter(handle, fieldnames=fieldnames)
+                writer = csv.DictWriter(handle, fieldnames=self.fieldnames,
+                                        extrasaction="ignore", restval="")
                 writer.writeheader()
                 writer.writerows(movies)
 
@@ -142,6 +164,28 @@ class StorageCsv(IStorage):
 
         return_to_menu()
 
+    def update_movies(self, changes):
+        """
+        Apply changed fields to several movies with a single rewrite of the CSV file.
+        Args:
+        changes (dict): Movie titles mapped to the fields to overwrite.
+        """
+        with open(self.file_path, "r") as handle:
+            reader = csv.DictReader(handle)
+            movies = list(reader)
+
+        for movie in movies:
+            if movie["title"] in changes:
+                movie.update(changes[movie["title"]])
+
+        temp_file_path = self.file_path + ".tmp"
+        with open(temp_file_path, "w", newline='') as handle:
+            writer = csv.DictWriter(handle, fieldnames=self.fieldnames,
+                                    extrasaction="ignore", restval="")
+            writer.writeheader()
+            writer.writerows(movies)
+        os.replace(temp_file_path, self.file_path)
+
     def get_country_id_flag(self, movie_title):
         """
         Get the country ID flag for a movie.
@@ -150,13 +194,18 @@ class StorageCsv(IStorage):
         Returns:
         str: The country ID flag.
         """
-        with open(self.file_path, "r") as csv_file:
-            reader = csv.DictReader(csv_file)
-            for row in reader:
-                if row["title"] == movie_title:
-                    country = row["country"]
-                    with open("countries.json", "r") as countries_file:
-                        countries_data = json.load(countries_file)
-                        country_dict = {val: key for key, val in countries_data.items()}
-                        if country in country_dict:
-                            return country_dict[country]
\ No newline at end of file
+        return self.get_country_id_flags(self.list_movies()).get(movie_title)
+
+    def get_country_id_flags(self, movies):
+        """
+        Get the country ID flags for several movies, loading the country list once.
+        Args:
+        movies (dict): The movies as returned by list_movies.
+        Returns:
+        dict: The movie titles mapped to their country ID flag.
+        """
+        with open("countries.json", "r") as countries_file:
+            countries_data = json.load(countries_file)
+            country_dict = {val: key for key, val in countries_data.items()}
+        return {title: country_dict[row["country"]] for title, row in movies.items()
+                if row.get("country") in country_dict}
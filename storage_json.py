@@ -1,4 +1,6 @@
 import json
+import os
+import time
 import requests
 from helpers import input_color, user_choice_color, error_color, return_to_menu
 from istorage import IStorage
@@ -63,7 +65,8 @@ class StorageJson(IStorage):
                     country_list.remove("United States")
                     country_list.insert(0, "United States")
                 movies[title] = {"rating": rating, "year": year, "poster": poster,
-                                 "id": imdb_id, "country": ", ".join(country_list)}
+                                 "id": imdb_id, "country": ", ".join(country_list),
+                                 "last_refreshed": int(time.time())}
                 with open(self.file_path, "w") as handle:
                     json.dump(movies, handle, indent=4)
                 print(f"Movie {user_choice_color(new_movie)} successfully added")
@@ -112,6 +115,22 @@ class StorageJson(IStorage):
             print(error_color("That movie is not in the list, look again in the list and try again"))
             return_to_menu()
 
+    def update_movies(self, changes):
+        """
+        Applies changed fields to several movies with a single write of the JSON file.
+        Args:
+        changes (dict): Movie titles mapped to the fields to overwrite.
+        """
+        with open(self.file_path, "r") as handle:
+            movies = json.load(handle)
+        for title, fields in changes.items():
+            if title in movies:
+                movies[title].update(fields)
+        temp_file_path = self.file_path + ".tmp"
+        with open(temp_file_path, "w") as handle:
+            json.dump(movies, handle, indent=4)
+        os.replace(temp_file_path, self.file_path)
+
     def get_country_id_flag(self, movie_title):
         """
         Get the country ID flag for a movie.
@@ -120,18 +139,23 @@ class StorageJson(IStorage):
         Returns:
         str: The country ID flag.
         """
-        with open(self.file_path, "r") as handle:
-            movies_str = handle.read()
-            movies = json.loads(movies_str)
+        return self.get_country_id_flags(self.list_movies()).get(movie_title)
 
-        movie_country = movies[movie_title]['country']
+    def get_country_id_flags(self, movies):
+        """
+        Get the country ID flags for several movies, loading the country list once.
+        Args:
+        movies (dict): The movies as returned by list_movies.
+        Returns:
+        dict: The movie titles mapped to the country ID flag of their first country.
+        """
         with open("countries.json", "r") as handle:
-            countries_str = handle.read()
-            countries = json.loads(countries_str)
-
-        countries_list = movie_country.split(',')
-        first_country = countries_list[0].strip()
+            countries = json.load(handle)
+        country_ids = {country_data: country_id for country_id, country_data in countries.items()}
 
-        for country_id, country_data in countries.items():
-            if country_data == first_country:
-                return country_id
+        flags = {}
+        for title, val in movies.items():
+            first_country = val.get('country', '').split(',')[0].strip()
+            if first_country in country_ids:
+                flags[title] = country_ids[first_country]
+        return flags
@@ -0,0 +1,164 @@
+import glob
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from unittest import mock
+import movie_app
+from asset_cache import AssetCache
+from storage_json import StorageJson
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "_static", "index_template.html")
+
+
+class StubImageHandler(BaseHTTPRequestHandler):
+    """
+    Serves the request path as the image content, paths under /missing/ answer 404.
+    """
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.calls.append(self.path)
+        if self.path.startswith("/missing/"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.end_headers()
+        self.wfile.write(self.path.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class AssetCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubImageHandler)
+        self.server.lock = threading.Lock()
+        self.server.calls = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, "cache")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.temp_dir.cleanup()
+
+    def test_files_are_named_by_content_hash(self):
+        url = f"{self.base_url}/posters/a.jpg"
+        local_assets = AssetCache(self.cache_dir).fetch_all([url])
+        file_name = hashlib.sha256(b"/posters/a.jpg").hexdigest() + ".jpg"
+        self.assertEqual(local_assets, {url: f"cache/{file_name}"})
+        with open(os.path.join(self.cache_dir, file_name), "rb") as handle:
+            self.assertEqual(handle.read(), b"/posters/a.jpg")
+
+    def test_second_fetch_skips_cached_and_refetches_deleted(self):
+        urls = [f"{self.base_url}/posters/a.jpg", f"{self.base_url}/posters/b.jpg"]
+        local_assets = AssetCache(self.cache_dir).fetch_all(urls)
+        self.assertEqual(len(self.server.calls), 2)
+
+        AssetCache(self.cache_dir).fetch_all(urls)
+        self.assertEqual(len(self.server.calls), 2)
+
+        os.remove(os.path.join(self.temp_dir.name, local_assets[urls[0]]))
+        AssetCache(self.cache_dir).fetch_all(urls)
+        self.assertEqual(self.server.calls[2:], ["/posters/a.jpg"])
+
+    def test_failed_download_is_not_cached(self):
+        ok_url = f"{self.base_url}/posters/a.jpg"
+        missing_url = f"{self.base_url}/missing/b.jpg"
+        local_assets = AssetCache(self.cache_dir).fetch_all([ok_url, missing_url, "N/A"])
+        self.assertEqual(list(local_assets), [ok_url])
+        with open(os.path.join(self.cache_dir, "index.json"), "r") as handle:
+            self.assertEqual(list(json.load(handle)), [ok_url])
+
+    def test_malformed_index_is_reset(self):
+        os.makedirs(self.cache_dir)
+        with open(os.path.join(self.cache_dir, "index.json"), "w") as handle:
+            handle.write("[]")
+        url = f"{self.base_url}/posters/a.jpg"
+        self.assertIn(url, AssetCache(self.cache_dir).fetch_all([url]))
+
+
+class GenerateWebsiteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubImageHandler)
+        self.server.lock = threading.Lock()
+        self.server.calls = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.previous_dir = os.getcwd()
+        os.chdir(self.temp_dir.name)
+        os.makedirs("_static")
+        shutil.copy(TEMPLATE_PATH, "_static")
+        with open("countries.json", "w") as handle:
+            json.dump({"es": "Spain"}, handle)
+
+    def tearDown(self):
+        os.chdir(self.previous_dir)
+        self.server.shutdown()
+        self.server.server_close()
+        self.temp_dir.cleanup()
+
+    def generate(self, movies):
+        with open("movies.json", "w") as handle:
+            json.dump(movies, handle)
+        app = movie_app.MovieApp(StorageJson("movies.json"))
+        with mock.patch("movie_app.return_to_menu"), mock.patch("builtins.print"), \
+                mock.patch.object(movie_app, "PAGE_SIZE", 2):
+            app._generate_website()
+
+    def movies(self, count, poster_path="posters"):
+        return {f"Movie {number}": {"rating": 7.0, "year": 2000, "id": f"tt{number}",
+                                    "country": "Nowhere",
+                                    "poster": f"{self.base_url}/{poster_path}/{number}.jpg"}
+                for number in range(count)}
+
+    def test_pages_follow_catalog_size(self):
+        self.generate(self.movies(5))
+        self.assertEqual(len(glob.glob("_static/*.html")) - 1, math.ceil(5 / 2))
+        with open("_static/page-3.html", "r") as handle:
+            page = handle.read()
+        self.assertIn("Movie 4", page)
+        self.assertNotIn("Movie 0", page)
+        self.assertIn('src="cache/', page)
+
+        with open("_static/page-about.html", "w") as handle:
+            handle.write("hand written")
+        self.generate(self.movies(2))
+        self.assertFalse(os.path.exists("_static/page-2.html"))
+        self.assertFalse(os.path.exists("_static/page-3.html"))
+        self.assertTrue(os.path.exists("_static/page-about.html"))
+
+    def test_failed_download_keeps_remote_url(self):
+        self.generate(self.movies(1, poster_path="missing"))
+        with open("_static/index.html", "r") as handle:
+            self.assertIn(f'src="{self.base_url}/missing/0.jpg"', handle.read())
+
+    def test_page_navigation_has_fixed_size(self):
+        app = movie_app.MovieApp(mock.Mock(list_movies=dict))
+        navigation = app._page_navigation(50, 100)
+        for number in (1, 48, 49, 51, 52, 100):
+            self.assertIn(f'href="page-{number}.html"' if number > 1 else 'href="index.html"',
+                          navigation)
+        self.assertNotIn("page-47.html", navigation)
+        self.assertNotIn("page-53.html", navigation)
+        self.assertEqual(len(app._page_navigation(50, 10000)), len(navigation) + 2)
+        self.assertNotIn("Prev", app._page_navigation(1, 100))
+        self.assertNotIn("Next", app._page_navigation(100, 100))
+
+
+if __name__ == "__main__":
+    unittest.main()
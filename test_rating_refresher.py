@@ -0,0 +1,157 @@
+import csv
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from rating_refresher import RatingRefresher
+from storage_json import StorageJson
+from storage_csv import StorageCsv
+
+
+class StubOmdbHandler(BaseHTTPRequestHandler):
+    """
+    Answers OMDb lookups by IMDb id from the server's scripted responses.
+    Each id maps to a list of (status, body) pairs consumed one per request,
+    the last pair is repeated once the list is exhausted.
+    """
+
+    def do_GET(self):
+        imdb_id = parse_qs(urlparse(self.path).query)["i"][0]
+        with self.server.lock:
+            self.server.calls.append(imdb_id)
+            self.server.call_times.append(time.monotonic())
+            script = self.server.responses[imdb_id]
+            status, body = script.pop(0) if len(script) > 1 else script[0]
+        self.send_response(status)
+        self.end_headers()
+        self.wfile.write(body.encode() if isinstance(body, str) else json.dumps(body).encode())
+
+    def log_message(self, *args):
+        pass
+
+
+def omdb_record(rating, poster="N/A"):
+    """
+    Builds a successful OMDb response body.
+    """
+    return {"Response": "True", "imdbRating": rating, "Poster": poster}
+
+
+class RatingRefresherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubOmdbHandler)
+        self.server.lock = threading.Lock()
+        self.server.calls = []
+        self.server.call_times = []
+        self.server.responses = {}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/"
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.temp_dir.cleanup()
+
+    def refresher(self, storage, **kwargs):
+        kwargs.setdefault("calls_per_second", 0)
+        return RatingRefresher(storage, base_url=self.base_url, backoff=0.01, **kwargs)
+
+    def json_storage(self, movies):
+        file_path = os.path.join(self.temp_dir.name, "movies.json")
+        with open(file_path, "w") as handle:
+            json.dump(movies, handle)
+        return StorageJson(file_path)
+
+    def test_stale_movies_uses_last_refreshed(self):
+        now = time.time()
+        movies = {"Fresh": {"id": "tt1", "last_refreshed": now - 60},
+                  "Stale": {"id": "tt2", "last_refreshed": now - 3600},
+                  "Never": {"id": "tt3"}}
+        refresher = self.refresher(None, stale_after=600)
+        self.assertEqual(refresher.stale_movies(movies, now=now), {"Stale": "tt2", "Never": "tt3"})
+        self.assertEqual(len(refresher.stale_movies(movies, refresh_all=True, now=now)), 3)
+
+    def test_retries_server_errors_then_succeeds(self):
+        self.server.responses["tt1"] = [(429, ""), (503, ""), (200, omdb_record("8.5"))]
+        storage = self.json_storage({"Movie": {"id": "tt1", "rating": 7.0}})
+        changes, failed = self.refresher(storage).refresh()
+        self.assertEqual(changes["Movie"]["rating"], 8.5)
+        self.assertEqual(failed, [])
+        self.assertEqual(self.server.calls, ["tt1", "tt1", "tt1"])
+
+    def test_gives_up_on_client_error(self):
+        self.server.responses["tt1"] = [(404, ""), (200, omdb_record("8.5"))]
+        storage = self.json_storage({"Movie": {"id": "tt1", "rating": 7.0}})
+        self.assertEqual(self.refresher(storage).refresh(), ({}, ["Movie"]))
+        self.assertEqual(self.server.calls, ["tt1"])
+        self.assertNotIn("last_refreshed", storage.list_movies()["Movie"])
+
+    def test_invalid_payload_is_a_failed_fetch(self):
+        self.server.responses["tt1"] = [(200, "<html>portal</html>")]
+        self.server.responses["tt2"] = [(200, [])]
+        self.server.responses["tt3"] = [(200, omdb_record("9.0"))]
+        storage = self.json_storage({"A": {"id": "tt1", "rating": 7.0},
+                                     "B": {"id": "tt2", "rating": 7.0},
+                                     "C": {"id": "tt3", "rating": 7.0}})
+        changes, failed = self.refresher(storage).refresh()
+        self.assertEqual(list(changes), ["C"])
+        self.assertEqual(sorted(failed), ["A", "B"])
+
+    def test_rate_limit_spaces_out_requests(self):
+        movies = {}
+        for number in range(6):
+            self.server.responses[f"tt{number}"] = [(200, omdb_record("8.0"))]
+            movies[f"Movie {number}"] = {"id": f"tt{number}", "rating": 7.0}
+        storage = self.json_storage(movies)
+        self.refresher(storage, calls_per_second=20, max_workers=6).refresh()
+        call_times = sorted(self.server.call_times)
+        self.assertEqual(len(call_times), 6)
+        self.assertGreaterEqual(call_times[-1] - call_times[0], 5 * 0.05 * 0.9)
+
+    def test_json_storage_batched_write(self):
+        self.server.responses["tt1"] = [(200, omdb_record("8.5", "http://img/new.jpg"))]
+        self.server.responses["tt2"] = [(200, omdb_record("6.0"))]
+        storage = self.json_storage({"A": {"id": "tt1", "rating": 7.0, "poster": "old"},
+                                     "B": {"id": "tt2", "rating": 6.0, "poster": "old"}})
+        writes = []
+        update_movies = storage.update_movies
+        storage.update_movies = lambda changes: writes.append(changes) or update_movies(changes)
+        self.refresher(storage).refresh()
+        self.assertEqual(len(writes), 1)
+        movies = storage.list_movies()
+        self.assertEqual(movies["A"]["rating"], 8.5)
+        self.assertEqual(movies["A"]["poster"], "http://img/new.jpg")
+        self.assertEqual(movies["B"]["rating"], 6.0)
+        self.assertEqual(movies["B"]["poster"], "old")
+        self.assertIn("last_refreshed", movies["B"])
+        self.assertEqual(self.refresher(storage).refresh(), ({}, []))
+
+    def test_csv_storage_batched_write_on_legacy_file(self):
+        self.server.responses["tt1"] = [(200, omdb_record("8.5"))]
+        file_path = os.path.join(self.temp_dir.name, "movies.csv")
+        with open(file_path, "w", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["title", "rating", "year", "id", "country", "comment", "poster"])
+            writer.writerow(["A", 7.0, 2000, "tt1", "Spain", "Nice", "old"])
+        storage = StorageCsv(file_path)
+        writes = []
+        update_movies = storage.update_movies
+        storage.update_movies = lambda changes: writes.append(changes) or update_movies(changes)
+        self.refresher(storage).refresh()
+        self.assertEqual(len(writes), 1)
+        movie = storage.list_movies()["A"]
+        self.assertEqual(movie["rating"], 8.5)
+        self.assertEqual(movie["comment"], "Nice")
+        self.assertTrue(movie["last_refreshed"])
+        with open(file_path, "r") as handle:
+            self.assertEqual(next(csv.reader(handle)), StorageCsv.fieldnames)
+
+
+if __name__ == "__main__":
+    unittest.main()